@@ -1,12 +1,59 @@
 
+import asyncio
+import importlib.util
+from collections import OrderedDict
 import httpx
 from pydantic import ValidationError
 from ucp_sdk.models.discovery.profile_schema import UcpDiscoveryProfile
 from .exceptions import UCPDiscoveryError, UCPConformanceError
+from . import serialization
 
 
 from .config import settings
 
+# HTTP/2 needs the optional 'h2' package (httpx[http2]); fall back to HTTP/1.1 keep-alive without it.
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Process-wide connection pool shared by every UCPClient, so repeated discover/call
+# operations reuse warm TCP/TLS connections instead of handshaking per instance.
+# Created lazily and bound to the event loop that created it: its connections cannot
+# be used from another loop, so a new loop (e.g. a second asyncio.run) gets a new pool.
+_shared_client: httpx.AsyncClient | None = None
+_shared_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    global _shared_client, _shared_client_loop
+    loop = asyncio.get_running_loop()
+    if _shared_client is None or _shared_client.is_closed or _shared_client_loop is not loop:
+        # A pool left behind by a finished loop can no longer be closed; drop it
+        _shared_client_loop = loop
+        _shared_client = httpx.AsyncClient(
+            timeout=settings.http_timeout,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+        )
+    return _shared_client
+
+
+async def aclose_shared_client() -> None:
+    """
+    Closes the process-wide connection pool. Call once at shutdown, never
+    per client or per session, since every UCPClient shares it.
+    Must run on the loop that owns the pool; a pool from another loop is just dropped.
+    """
+    global _shared_client, _shared_client_loop
+    client, owner = _shared_client, _shared_client_loop
+    _shared_client, _shared_client_loop = None, None
+    if client is not None and not client.is_closed and owner is asyncio.get_running_loop():
+        await client.aclose()
+
+
+# Discovery URL -> (ETag, profile), shared by every UCPClient for conditional
+# re-discovery. Bounded LRU: the least recently used URL is evicted first.
+_DISCOVERY_CACHE_SIZE = 64
+_discovery_cache: OrderedDict[str, tuple[str, UcpDiscoveryProfile]] = OrderedDict()
+
 
 class UCPClient:
     """Client for interacting with UCP Servers."""
@@ -14,10 +61,22 @@ class UCPClient:
     def __init__(self, timeout: float = None, agent_profile: str = "default-hub-profile"):
         if timeout is None:
             timeout = settings.http_timeout
+        self.timeout = timeout
         self.headers = {"UCP-Agent": f"profile={agent_profile}"}
-        self.client = httpx.Client(timeout=timeout, headers=self.headers)
 
-    def discover_services(self, url: str) -> UcpDiscoveryProfile:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared pooled HTTP client."""
+        return _get_shared_client()
+
+    async def request(self, method: str, url: str, headers: dict = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request over the shared pool with this client's headers and timeout applied.
+        """
+        request_headers = {**self.headers, **headers} if headers else self.headers
+        return await self.client.request(method, url, headers=request_headers, timeout=self.timeout, **kwargs)
+
+    async def discover_services(self, url: str) -> UcpDiscoveryProfile:
         """
         Discovers capabilities from a UCP server.
 
@@ -35,16 +94,33 @@ class UCPClient:
         base_url = url.rstrip("/")
         discovery_url = f"{base_url}/.well-known/ucp"
 
+        # Revalidate a previously seen profile instead of refetching it in full
+        cached = _discovery_cache.get(discovery_url)
+        if cached:
+            _discovery_cache.move_to_end(discovery_url)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
         try:
-            response = self.client.get(discovery_url)
+            response = await self.request("GET", discovery_url, headers=headers)
+            if cached and response.status_code == httpx.codes.NOT_MODIFIED:
+                return cached[1]
             response.raise_for_status()
         except httpx.HTTPError as e:
             raise UCPDiscoveryError(f"Failed to fetch discovery info from {discovery_url}: {e}") from e
 
         try:
             # Validate against the official SDK model
-            payload = response.json()
-            model = UcpDiscoveryProfile(**payload)
+            payload = serialization.loads(response.content)
+            model = UcpDiscoveryProfile.model_validate(payload)
+
+            etag = response.headers.get("ETag")
+            if etag:
+                _discovery_cache[discovery_url] = (etag, model)
+                _discovery_cache.move_to_end(discovery_url)
+                if len(_discovery_cache) > _DISCOVERY_CACHE_SIZE:
+                    _discovery_cache.popitem(last=False)
+            else:
+                _discovery_cache.pop(discovery_url, None)
 
             return model
 
@@ -1,10 +1,38 @@
 
 import os
+import stat
 import yaml
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, List, Optional, Any
 from pydantic import Field
 from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
 
+# Prefer the libyaml-backed C loader when available; fall back to pure Python.
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Project root (src layout), used as the fallback location for config.yaml
+_PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+
+
+@lru_cache(maxsize=8)
+def _load_yaml(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Parses a YAML file. Keyed on mtime so edits to the file invalidate the cache.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
+def _stat_file(path: Path) -> Optional[os.stat_result]:
+    """Returns the stat of path if it is a regular file, else None."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
 class YamlConfigSettingsSource(PydanticBaseSettingsSource):
     """
     A settings source that loads configuration from 'config.yaml'.
@@ -15,21 +43,19 @@ class YamlConfigSettingsSource(PydanticBaseSettingsSource):
 
     def __call__(self) -> Dict[str, Any]:
         # Look for config.yaml in the current working directory or relative to this file
-        config_file = os.getenv("UCP_CONFIG_PATH", "config.yaml")
-        
-        # Try looking in the package root if CWD fails
-        if not os.path.exists(config_file):
-             # Adjusted for src layout
-             package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) 
-             candidate = os.path.join(package_root, "config.yaml")
-             if os.path.exists(candidate):
-                 config_file = candidate
-
-        if not os.path.exists(config_file):
-            return {}
-            
-        with open(config_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
+        # (an empty UCP_CONFIG_PATH is not a path; skip straight to the fallback)
+        env_path = os.getenv("UCP_CONFIG_PATH", "config.yaml")
+        config_file = Path(env_path) if env_path else None
+        st = _stat_file(config_file) if config_file else None
+        if st is None:
+            # Try looking in the package root if CWD fails
+            config_file = _PACKAGE_ROOT / "config.yaml"
+            st = _stat_file(config_file)
+            if st is None:
+                return {}
+
+        # Shallow copy so callers cannot mutate the cached object
+        return dict(_load_yaml(str(config_file.absolute()), st.st_mtime_ns))
 
 class Settings(BaseSettings):
     """
@@ -63,6 +89,9 @@ class Settings(BaseSettings):
     http_timeout: float = 10.0
     jwt_expiry_seconds: int = 300
 
+    # Pre-initialize the crypto backend at startup so the first mandate isn't slow
+    warmup_crypto: bool = False
+
     def model_post_init(self, __context: Any) -> None:
         if self.endpoint_map is None:
             self.endpoint_map = {}
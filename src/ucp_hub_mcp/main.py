@@ -1,4 +1,5 @@
 
+import asyncio
 import typer
 import sys
 from .client import UCPClient
@@ -19,12 +20,12 @@ def discover(url: str = typer.Option(settings.ucp_server_url, help="The URL of t
     console.print(f"[bold blue]Discovering services at {url}...[/bold blue]")
 
     try:
-        discovery_data = client.discover_services(url)
+        discovery_data = asyncio.run(client.discover_services(url))
         console.print("[bold green]Success! Found the following capabilities:[/bold green]")
         
-        # Dump the Pydantic model to JSON for pretty printing
-        json_output = discovery_data.model_dump_json(indent=2, exclude_none=True)
-        print_json(json_output)
+        # Dump the Pydantic model to JSON-compatible data; rich serializes it once for pretty printing
+        data = discovery_data.model_dump(mode="json", exclude_none=True)
+        print_json(data=data)
         
     except UCPError as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
@@ -1,7 +1,28 @@
 
-from typing import Dict, List, Optional
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
 from ucp_sdk.models.discovery.profile_schema import UcpDiscoveryProfile
 from ucp_sdk.models._internal import Discovery
+from . import serialization
+
+# Shared by every tool definition. Treat as read-only.
+_INPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "payload": {"type": "object"}
+    }
+}
+
+# Characters that give a query regex semantics; queries without them are plain substrings.
+_REGEX_META = frozenset(r".^$*+?{}[]\|()")
+
+
+@lru_cache(maxsize=256)
+def _compile(pattern: str) -> re.Pattern:
+    """Compiles (and memoizes) a case-insensitive search pattern."""
+    return re.compile(pattern, re.IGNORECASE)
+
 
 class ToolRegistry:
     """
@@ -14,6 +35,10 @@ class ToolRegistry:
     def __init__(self):
         self._deferred_tools: Dict[str, Discovery] = {}
         self._loaded_tools: Dict[str, Discovery] = {}
+        # Tool definitions are static per capability, so they are built once at registration.
+        self._tool_defs: Dict[str, dict] = {}
+        self._names_lower: Dict[str, str] = {}
+        self._tool_defs_json: Dict[str, bytes] = {}
 
     def register_from_profile(self, profile: UcpDiscoveryProfile):
         """
@@ -23,34 +48,44 @@ class ToolRegistry:
             for cap in profile.ucp.capabilities:
                 # Store by name (e.g., 'dev.ucp.shopping.checkout')
                 self._deferred_tools[cap.name] = cap
+                self._names_lower[cap.name] = cap.name.lower()
+                tool_def = {
+                    "name": cap.name,
+                    "description": f"UCP Capability: {cap.name} (Spec: {cap.spec})",
+                    "input_schema": _INPUT_SCHEMA
+                }
+                self._tool_defs[cap.name] = tool_def
+                self._tool_defs_json[cap.name] = serialization.dumps(tool_def)
+
+    def _match_names(self, query_regex: Union[str, re.Pattern]) -> List[str]:
+        """
+        Returns the names of deferred tools matching the query.
+        Accepts a pattern string (compiled through the shared cache) or a precompiled pattern.
+        """
+        if isinstance(query_regex, re.Pattern):
+            return [name for name in self._deferred_tools if query_regex.search(name)]
+
+        if _REGEX_META.isdisjoint(query_regex):
+            # Plain substring: skip the regex engine entirely
+            query = query_regex.lower()
+            return [name for name, lowered in self._names_lower.items() if query in lowered]
+
+        pattern = _compile(query_regex)
+        return [name for name in self._deferred_tools if pattern.search(name)]
 
-    def search_tools(self, query_regex: str) -> List[dict]:
+    def search_tools(self, query_regex: Union[str, re.Pattern]) -> List[dict]:
         """
         Searches deferred tools by name using regex match.
         Returns a list of simplified tool definitions (JSON schemas).
         """
-        import re
-        results = []
-        pattern = re.compile(query_regex, re.IGNORECASE)
-        
-        for name, cap in self._deferred_tools.items():
-            if pattern.search(name):
-                # We return the tool definition.
-                # Since 'cap' is a Pydantic model (Capabilities), we dump it to dict.
-                
-                tool_def = {
-                    "name": cap.name,
-                    "description": f"UCP Capability: {cap.name} (Spec: {cap.spec})",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "payload": {"type": "object"}
-                        }
-                    }
-                }
-                results.append(tool_def)
-                
-        return results
+        return [self._tool_defs[name] for name in self._match_names(query_regex)]
+
+    def search_tools_json(self, query_regex: Union[str, re.Pattern]) -> bytes:
+        """
+        Same as search_tools, but returns the result as a JSON array assembled
+        from definitions pre-serialized at registration time.
+        """
+        return b"[" + b",".join(self._tool_defs_json[name] for name in self._match_names(query_regex)) + b"]"
 
     def get_tool(self, name: str) -> Optional[dict]:
         """
@@ -63,11 +98,4 @@ class ToolRegistry:
         # Move to loaded (conceptually, though for search we keep it available)
         self._loaded_tools[name] = cap
         
-        return {
-            "name": cap.name,
-            "description": f"UCP Capability: {cap.name}",
-            "input_schema": {
-                "type": "object",
-                "properties": {"payload": {"type": "object"}}
-            }
-        }
+        return self._tool_defs[name]
@@ -1,10 +1,72 @@
 
+import builtins
+import importlib
+import logging
+import os
+import sys
+import time
+import types
+import uuid
+from functools import lru_cache
+from secrets import token_hex
 from typing import Any
 from ucp_hub_mcp.client import UCPClient
 from ucp_hub_mcp.registry import ToolRegistry
 from ucp_hub_mcp.security import AP2Security, KeyManager
+from ucp_hub_mcp import serialization
 from .config import settings
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@lru_cache(maxsize=256)
+def _compile_wrapped(code: str) -> types.CodeType:
+    """
+    Wraps user code in an async function and compiles it.
+    Memoized so retried or repeated scripts skip the parse/compile pipeline.
+    """
+    # Wrap user code in an async function to allow 'await'
+    # Normalize line endings first: the tokenizer also breaks lines on a lone '\r'
+    code = code.replace("\r\n", "\n").replace("\r", "\n")
+    # Indent code by 4 spaces in a single str.replace pass (blank scripts never get here)
+    wrapped_code = "async def _agent_script():\n    " + code.replace("\n", "\n    ")
+    return compile(wrapped_code, "<sandbox>", "exec")
+
+
+def _import_sandbox_modules() -> dict:
+    """Imports the modules whitelisted in settings.sandbox_globals."""
+    modules = {}
+    for module_name in settings.sandbox_globals:
+        try:
+            modules[module_name] = importlib.import_module(module_name)
+        except ImportError:
+            logger.warning("Configured sandbox module '%s' could not be imported.", module_name)
+    return modules
+
+
+# Restricted builtins allow-list. Scripts never see this dict itself: each run
+# gets its own copy (see Sandbox.run), which is what isolates runs from each other.
+_SAFE_BUILTINS = {
+    "print": print,
+    "len": len,
+    "range": range,
+    "min": min,
+    "max": max,
+    "list": list,
+    "dict": dict,
+    "set": set,
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "next": next,
+}
+
+# Whitelisted modules are resolved once at import rather than per Sandbox.
+_SANDBOX_MODULES = _import_sandbox_modules()
+
+
 class UCPProxy:
     """
     A safe proxy object injected into the Sandbox.
@@ -16,15 +78,19 @@ class UCPProxy:
         self._security = AP2Security()
         self._key_manager = KeyManager()
         self._discovered_payment_handlers = []
-        self._last_discovery_url = settings.ucp_server_url
+        # Endpoint mappings are fixed for the life of the process
+        self._endpoint_map = settings.endpoint_map
+        self._set_base_url(settings.ucp_server_url)
+        # Conformance headers that do not vary per request
+        self._static_headers = {"ucp-key-id": self._key_manager.key_id}
 
     async def discover(self, url: str) -> list[dict]:
         """
         Discovers services at the given URL and returns a list of capability descriptors.
         Also registers them in the Hub's registry (Deferred Loading).
         """
-        profile = self._client.discover_services(url)
-        self._last_discovery_url = url.rstrip("/")
+        profile = await self._client.discover_services(url)
+        self._set_base_url(url.rstrip("/"))
         self._registry.register_from_profile(profile)
         
         # Store payment handlers from Phase 4
@@ -32,60 +98,66 @@ class UCPProxy:
             self._discovered_payment_handlers = profile.payment.handlers
         
         # Return a simplified list of what was found for the agent's logic
-        results = []
-        if profile.ucp and profile.ucp.capabilities:
-            for cap in profile.ucp.capabilities:
-                results.append({
-                    "name": cap.name,
-                    "spec": str(cap.spec) if cap.spec else None,
-                    "version": str(cap.version)
-                })
-        return results
+        return self._build_results(profile)
+
+    @staticmethod
+    def _build_results(profile) -> list[dict]:
+        """Summarizes the profile's capabilities for the agent."""
+        if not (profile.ucp and profile.ucp.capabilities):
+            return []
+        return [
+            {
+                "name": cap.name,
+                "spec": str(cap.spec) if cap.spec else None,
+                "version": str(cap.version)
+            }
+            for cap in profile.ucp.capabilities
+        ]
 
     async def select_payment_method(self, method_name: str, amount: float = 0.0, currency: str = "BRL") -> dict:
         """
         Selects a payment method and generates an AP2 security mandate.
         Returns a payment token to be used in checkout.
         """
-        import uuid
-        
         # Generate Security Mandate (JWT)
         mandate_jwt = self._security.create_mandate(amount, currency, beneficiary="merchant-id")
         
-        print(f"[UCPProxy] Generated AP2 Mandate for {amount} {currency} via {method_name}")
+        logger.debug("Generated AP2 Mandate for %s %s via %s", amount, currency, method_name)
         
         return {
-            "token": f"pay_{uuid.uuid4().hex[:24]}", # Unique Payment Provider Token
+            "token": f"pay_{token_hex(12)}", # Unique Payment Provider Token
             "mandate": mandate_jwt,
             "method": method_name
         }
 
-    def _resolve_endpoint(self, tool_name: str) -> str:
-        """Resolves the UCP endpoint path for a given tool name."""
-        return settings.endpoint_map.get(tool_name)
+    def _set_base_url(self, url: str) -> None:
+        """Sets the target server and precomputes the full URL of every mapped endpoint."""
+        self._last_discovery_url = url
+        self._endpoints = {
+            name: url + path for name, path in self._endpoint_map.items() if path
+        } if url else {}
 
-    def _get_conformance_headers(self, payload_str: str = "") -> dict:
+    def _get_conformance_headers(self, payload_bytes: bytes = b"") -> dict:
         """Generates standard UCP Conformance headers with Ed25519 signature."""
-        import uuid
-        import time
-        
         # Security Headers
-        request_id = str(uuid.uuid4())
-        idempotency_key = str(uuid.uuid4())
-        timestamp = str(int(time.time()))
-        nonce = uuid.uuid4().hex[:16]
+        # One urandom read covers both UUIDs and the nonce (vs. a syscall per uuid4()).
+        buf = os.urandom(40)
+        request_id = str(uuid.UUID(bytes=buf[0:16], version=4))
+        idempotency_key = str(uuid.UUID(bytes=buf[16:32], version=4))
+        nonce = buf[32:40].hex()
+        timestamp = f"{int(time.time())}"
         
         # Signing Input: Timestamp + Nonce + Payload (prevent replay & tampering)
-        signing_input = f"{timestamp}.{nonce}.{payload_str}"
+        signing_input = f"{timestamp}.{nonce}.".encode() + payload_bytes
         signature = self._key_manager.sign(signing_input)
         
         return {
+            **self._static_headers,
             "request-id": request_id,
             "idempotency-key": idempotency_key,
             "ucp-timestamp": timestamp,
             "ucp-nonce": nonce,
             "request-signature": signature,
-            "ucp-key-id": self._key_manager.key_id
         }
 
     async def call(self, tool_name: str, **kwargs) -> Any:
@@ -93,54 +165,50 @@ class UCPProxy:
         Executes a UCP capability (Tool) using real HTTP transport against the discovered URL.
         Orchestrates resolution, headers, and request dispatch.
         """
-        print(f"[UCPProxy] Calling tool: {tool_name}")
+        logger.debug("Calling tool: %s", tool_name)
         if not self._last_discovery_url:
             raise RuntimeError("You must call 'await ucp.discover(url)' before calling capabilities.")
 
-        endpoint_path = self._resolve_endpoint(tool_name)
-        if not endpoint_path:
+        full_url = self._endpoints.get(tool_name)
+        if not full_url:
              raise ValueError(f"Tool '{tool_name}' is not currently mapped to a supported endpoint.")
-
-        base_url = self._last_discovery_url
-        full_url = f"{base_url}{endpoint_path}"
         
         # Dispatch request logic
-        return self._dispatch_request(full_url, kwargs)
+        return await self._dispatch_request(full_url, kwargs)
 
-    def _dispatch_request(self, url: str, kwargs: dict) -> dict:
+    async def _dispatch_request(self, url: str, kwargs: dict) -> dict:
         """Handles the HTTP request logic based on the operation type."""
-        import json
-        
+        # Read the control flag without mutating the caller's dict (keeps kwargs reusable for retries)
+        action = kwargs.get("_action")
+        if "_action" in kwargs:
+            kwargs = {k: v for k, v in kwargs.items() if k != "_action"}
         checkout_id = kwargs.get("id")
-        action = kwargs.pop("_action", None)
-        client = self._client.client
+        client = self._client
         
-        # Prepare payload and headers
-        payload = kwargs
-        if action == "complete":
-             payload = kwargs.get("payment", kwargs)
+        # Prepare payload and headers: 'complete' sends only the payment block when present
+        payload = kwargs["payment"] if action == "complete" and "payment" in kwargs else kwargs
         
-        # Canonical serialization for signing
+        # Canonical serialization for signing (done once; transport only varies by method)
         # sort_keys=True ensures deterministic hashing/signing
-        payload_str = json.dumps(payload, sort_keys=True)
-        headers = self._get_conformance_headers(payload_str)
+        payload_bytes = serialization.dumps(payload, sort_keys=True)
+        headers = self._get_conformance_headers(payload_bytes)
 
         try:
             if not checkout_id:
                 # CREATE
-                print(f"[UCPProxy] Transport: POST {url}")
-                # We use content=payload_str to ensure byte-level match with signature
-                resp = client.post(url, content=payload_str, headers=headers)
+                logger.debug("Transport: POST %s", url)
+                # We use content=payload_bytes to ensure byte-level match with signature
+                resp = await client.request("POST", url, content=payload_bytes, headers=headers)
             elif action == "complete":
                 # COMPLETE
                 complete_url = f"{url}/{checkout_id}/complete"
-                print(f"[UCPProxy] Transport: POST {complete_url}")
-                resp = client.post(complete_url, content=payload_str, headers=headers)
+                logger.debug("Transport: POST %s", complete_url)
+                resp = await client.request("POST", complete_url, content=payload_bytes, headers=headers)
             else:
                 # UPDATE
                 update_url = f"{url}/{checkout_id}"
-                print(f"[UCPProxy] Transport: PUT {update_url}")
-                resp = client.put(update_url, content=payload_str, headers=headers)
+                logger.debug("Transport: PUT %s", update_url)
+                resp = await client.request("PUT", update_url, content=payload_bytes, headers=headers)
             
             resp.raise_for_status()
             resp.raise_for_status()
@@ -151,11 +219,11 @@ class UCPProxy:
             
     def _handle_http_error(self, e: Exception) -> None:
         """Formats and re-raises HTTP errors with detail."""
-        print(f"[UCPProxy] HTTP Error: {e}")
+        logger.warning("HTTP Error: %s", e)
         error_msg = str(e)
         if hasattr(e, "response") and e.response:
              detail = e.response.text
-             print(f"Server Response: {detail}")
+             logger.warning("Server Response: %s", detail)
              error_msg += f" | Details: {detail}"
         raise Exception(error_msg) from e
 
@@ -164,42 +232,25 @@ class Sandbox:
     """
     An asyncio-aware sandbox for executing untrusted Python code.
     Allows for configuration of allowed globals (Open/Closed Principle).
+
+    With secure=False, scripts get the full Python builtins instead of the
+    curated allow-list. Only use this for trusted code.
     """
-    def __init__(self, registry: ToolRegistry, additional_globals: dict = None):
+    def __init__(self, registry: ToolRegistry, additional_globals: dict = None, secure: bool = True):
         self.proxy = UCPProxy(registry)
+        self.secure = secure
         self.safe_globals = self._build_safe_globals(additional_globals)
+        # Plain-dict copy of the builtins so each run can clone it with a C-level dict.copy()
+        self._builtins_template = dict(self.safe_globals["__builtins__"])
 
     def _build_safe_globals(self, additional_globals: dict = None) -> dict:
         """Constructs the restricted global environment."""
-        import importlib
-        
         base_globals = {
             "ucp": self.proxy,
             "print": print,
-            "__builtins__": {
-                "print": print,
-                "len": len,
-                "range": range,
-                "min": min,
-                "max": max,
-                "list": list,
-                "dict": dict,
-                "set": set,
-                "str": str,
-                "int": int,
-                "float": float,
-                "bool": bool,
-                "next": next,
-            }
+            "__builtins__": _SAFE_BUILTINS if self.secure else vars(builtins),
+            **_SANDBOX_MODULES,
         }
-        
-        # Dynamic import of allowed modules from config
-        for module_name in settings.sandbox_globals:
-             try:
-                 mod = importlib.import_module(module_name)
-                 base_globals[module_name] = mod
-             except ImportError:
-                 print(f"Warning: Configured sandbox module '{module_name}' could not be imported.")
 
         if additional_globals:
             # Securely merge allowed globals.
@@ -219,26 +270,37 @@ class Sandbox:
         """
         Executes the provided Python code string in a restricted environment.
         """
-        from io import StringIO
-        import contextlib
-        
-        output_buffer = StringIO()
-        
-        # Wrap user code in an async function to allow 'await'
-        # Indent code by 4 spaces
-        indented_code = "\n".join("    " + line for line in code.splitlines())
-        wrapped_code = f"async def _agent_script():\n{indented_code}"
+        # Nothing to run: skip compilation and task setup entirely
+        if not code.strip():
+            return ""
+
+        # Output is captured through an injected print rather than by swapping
+        # sys.stdout, so concurrent runs cannot interleave their output.
+        parts: list[str] = []
+
+        def _print(*args, sep=" ", end="\n", file=None, flush=False):
+            if file is not None and file is not sys.stdout:
+                # Explicit streams (e.g. sys.stderr) are honored, not captured
+                print(*args, sep=sep, end=end, file=file, flush=flush)
+                return
+            parts.append((" " if sep is None else sep).join(map(str, args)))
+            parts.append("\n" if end is None else end)
+
+        run_builtins = self._builtins_template.copy()
+        run_builtins["print"] = _print
+        run_globals = self.safe_globals.copy()
+        run_globals["print"] = _print
+        run_globals["__builtins__"] = run_builtins
         
         try:
-            with contextlib.redirect_stdout(output_buffer):
-                # 1. Compile and Execution Definition
-                exec(wrapped_code, self.safe_globals)
-                
-                # 2. Execute the function
-                _agent_script = self.safe_globals["_agent_script"]
-                await _agent_script()
+            # 1. Compile (cached) and Execution Definition
+            exec(_compile_wrapped(code), run_globals)
+            
+            # 2. Execute the function
+            _agent_script = run_globals["_agent_script"]
+            await _agent_script()
                 
-            return output_buffer.getvalue()
+            return "".join(parts)
             
         except Exception as e:
-            return f"{output_buffer.getvalue()}\nRuntime Error: {e}"
+            return f"{''.join(parts)}\nRuntime Error: {e}"
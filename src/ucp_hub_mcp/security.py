@@ -1,12 +1,33 @@
 
 import base64
-import json
+import hashlib
 import time
 from typing import Dict, Any
 
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
 from .config import settings
+from .serialization import dumps as json_dumps
+
+# Unpadded base64url lengths of fixed-size Ed25519 values
+_B64_PUBLIC_KEY_CHARS = 43  # 32-byte raw public key
+_B64_SIGNATURE_CHARS = 86   # 64-byte signature
+
+
+def _b64url_nopad_fixed(data: bytes, n_chars: int) -> str:
+    """
+    Base64url-encodes fixed-size data, slicing off the known padding instead of scanning for it.
+    """
+    return base64.urlsafe_b64encode(data).decode("ascii")[:n_chars]
+
+
+def warm_up_crypto() -> None:
+    """
+    Generates a throwaway Ed25519 key and signs with it, so backend
+    initialization happens at startup instead of on the first real mandate.
+    """
+    ed25519.Ed25519PrivateKey.generate().sign(b"warmup")
+
 
 class KeyManager:
     """
@@ -17,19 +38,20 @@ class KeyManager:
         self._private_key = ed25519.Ed25519PrivateKey.generate()
         self._public_key = self._private_key.public_key()
         
-        # Generate a stable ID for this key
+        # Generate a stable ID for this key (a short digest of the public key)
         public_bytes = self._public_key.public_bytes(
             encoding=serialization.Encoding.Raw,
             format=serialization.PublicFormat.Raw
         )
-        self.key_id = f"hub-key-{base64.urlsafe_b64encode(public_bytes[:8]).decode().rstrip('=')}"
+        self.key_id = f"hub-key-{hashlib.blake2b(public_bytes, digest_size=6).hexdigest()}"
 
-    def sign(self, payload: str) -> str:
+    def sign(self, payload: bytes) -> bytes:
         """
         Signs the payload bytes using Ed25519.
+        Returns the unpadded base64url signature as ASCII bytes.
         """
-        signature = self._private_key.sign(payload.encode("utf-8"))
-        return base64.urlsafe_b64encode(signature).decode().rstrip("=")
+        signature = self._private_key.sign(payload)
+        return base64.urlsafe_b64encode(signature)[:_B64_SIGNATURE_CHARS]
         
     def get_public_jwk(self) -> Dict[str, Any]:
         """
@@ -39,7 +61,7 @@ class KeyManager:
             encoding=serialization.Encoding.Raw,
             format=serialization.PublicFormat.Raw
         )
-        x_coord = base64.urlsafe_b64encode(public_bytes).decode().rstrip("=")
+        x_coord = _b64url_nopad_fixed(public_bytes, _B64_PUBLIC_KEY_CHARS)
         
         return {
             "kty": "OKP",
@@ -54,17 +76,23 @@ class AP2Security:
     """
     def __init__(self):
         self.key_manager = KeyManager()
+        # Bound once to skip the KeyManager indirection on every mandate
+        self._sign = self.key_manager._private_key.sign
 
-    def create_mandate(self, amount: float, currency: str, beneficiary: str) -> str:
-        """
-        Creates a signed JWT mandate authorizing a specific transaction.
-        """
+        # The JWT header only depends on the key, so encode it once
         header = {
             "alg": "EdDSA",
             "typ": "JWT",
             "kid": self.key_manager.key_id
         }
-        
+        self._b64_header = base64.urlsafe_b64encode(json_dumps(header)).rstrip(b"=")
+
+    def create_mandate(self, amount: float, currency: str, beneficiary: str) -> str:
+        """
+        Creates a signed JWT mandate authorizing a specific transaction.
+        """
+        b64 = base64.urlsafe_b64encode
+
         payload = {
             "iss": "ucp-hub-mcp",
             "sub": "agent-autonomous-action",
@@ -79,11 +107,11 @@ class AP2Security:
         }
         
         # Base64url encoding without padding
-        b64_header = base64.urlsafe_b64encode(json.dumps(header).encode()).decode().rstrip("=")
-        b64_payload = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+        # (kept as ASCII bytes end to end; decoded once at the very end)
+        b64_payload = b64(json_dumps(payload, sort_keys=True)).rstrip(b"=")
         
         # Sign header.payload
-        signing_input = f"{b64_header}.{b64_payload}"
-        signature = self.key_manager.sign(signing_input)
+        signing_input = self._b64_header + b"." + b64_payload
+        b64_sig = b64(self._sign(signing_input))[:_B64_SIGNATURE_CHARS]
         
-        return f"{signing_input}.{signature}"
+        return b".".join((signing_input, b64_sig)).decode("ascii")
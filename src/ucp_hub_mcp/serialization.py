@@ -0,0 +1,45 @@
+
+"""
+JSON helpers backed by orjson when installed (`pip install ucp-hub-mcp[speedups]`),
+otherwise the standard library. Both paths emit compact JSON for ordinary data.
+Values orjson cannot encode (e.g. integers beyond 64 bits) fall back to the
+standard library. NaN/Infinity differ: orjson writes them as null.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool) -> bytes:
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Serializes obj to compact UTF-8 JSON bytes.
+    sort_keys=True yields a canonical form suitable for signing.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return _stdlib_dumps(obj, sort_keys)
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Parses JSON from bytes or str.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # The stdlib also accepts NaN/Infinity literals; let it have the final say
+            pass
+    return json.loads(data)
@@ -1,7 +1,10 @@
 
+import anyio
 from mcp.server.fastmcp import FastMCP
-from ucp_hub_mcp.client import UCPClient
+from ucp_hub_mcp.client import UCPClient, aclose_shared_client
 from ucp_hub_mcp.registry import ToolRegistry
+from ucp_hub_mcp.security import warm_up_crypto
+from ucp_hub_mcp.config import settings
 from ucp_hub_mcp.tools.search import ToolSearchTool
 from ucp_hub_mcp.tools.code_execution import CodeExecutionTool
 
@@ -29,7 +32,7 @@ async def refresh_ucp_discovery(url: str) -> str:
     """
     client = UCPClient()
     try:
-        profile = client.discover_services(url)
+        profile = await client.discover_services(url)
         registry.register_from_profile(profile)
         count = len(registry._deferred_tools)
         return f"Successfully discovered {count} capabilities from {url}. They are now available via tool search."
@@ -45,12 +48,23 @@ async def execute_python(code: str) -> str:
     """
     return await code_tool.execute({"code": code})
 
+async def _serve():
+    """Runs the stdio transport, then closes the shared HTTP pool on the same loop."""
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        # The pool is process-wide, so it is released once here rather than per MCP session.
+        await aclose_shared_client()
+
 def main():
     """Entry point for the MCP Server."""
     # FastMCP handles transport selection via CLI args, but we can set defaults or direct execution here if needed.
-    # For now, we rely on the standard mcp.run() which auto-detects SSE/Stdio.
+    # We drive the stdio transport ourselves (what mcp.run() does by default) so that
+    # shutdown runs on the same event loop that owns the pooled HTTP connections.
     # To enforce env vars, one would typically use them in the deployment command or here.
-    mcp.run()
+    if settings.warmup_crypto:
+        warm_up_crypto()
+    anyio.run(_serve)
 
 if __name__ == "__main__":
     main()